@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .models import Product as ProductModel
+from .shared import get_catalogue_pointer
+
+
+# Fields that are left out of the lightweight list representation.
+SUMMARY_EXCLUDED_FIELDS = ("description",)
+
+# Content codings whose ETag variants `match_etag` recognises.
+CONTENT_CODINGS = ("gzip", "br", "deflate")
+
+
+@dataclass(frozen=True)
+class CatalogueSnapshot:
+    """
+    Immutable, read-only view of the products table.
+
+    Rows are serialised to JSON once, when the snapshot is built, so requests
+    only slice and join pre-encoded bytes.
+
+    `version` is a digest of the serialised catalogue, so every worker that
+    loads the same rows computes the same version (and therefore the same
+    ETags), which keeps CDN revalidation consistent across replicas.
+    """
+
+    version: str
+    ids: List[int]
+    full_rows: List[bytes]
+    summary_rows: List[bytes]
+    by_id: Dict[int, bytes]
+    item_etags: Dict[int, str]
+
+    @property
+    def total(self) -> int:
+        return len(self.ids)
+
+    def list_etag(self, skip: int, limit: int, view: str = "full") -> str:
+        return f'"{self.version}-{view}-{skip}-{limit}"'
+
+    def render_list(self, skip: int, limit: int, view: str = "full") -> bytes:
+        rows = self.summary_rows if view == "summary" else self.full_rows
+        return (
+            b'{"total":'
+            + str(self.total).encode("ascii")
+            + b',"items":['
+            + b",".join(rows[skip : skip + limit])
+            + b"]}"
+        )
+
+
+_lock = threading.Lock()
+_snapshot: Optional[CatalogueSnapshot] = None
+# Last published catalogue version this process loaded from.
+_seen_pointer: Optional[str] = None
+
+
+def product_to_row(model: ProductModel) -> Dict[str, Any]:
+    """Convert SQLAlchemy model → JSON-ready dict with parsed activities list."""
+    activities = [
+        a.strip()
+        for a in (model.activities or "").split(",")
+        if a.strip()
+    ]
+    return {
+        "id": model.id,
+        "title": model.title,
+        "slug": model.slug,
+        "product_url": model.product_url,
+        "price": model.price,
+        "currency": model.currency,
+        "description": model.description,
+        "features": model.features,
+        "image_url": model.image_url,
+        "category": model.category,
+        "subcategory": model.subcategory,
+        "activities": activities,
+    }
+
+
+def _build_snapshot(db: Session) -> CatalogueSnapshot:
+    models = db.scalars(select(ProductModel).order_by(ProductModel.id))
+
+    ids: List[int] = []
+    full_rows: List[bytes] = []
+    summary_rows: List[bytes] = []
+    item_etags: Dict[int, str] = {}
+    catalogue_hash = hashlib.sha256()
+
+    for model in models:
+        row = product_to_row(model)
+        full = orjson.dumps(row)
+        for field in SUMMARY_EXCLUDED_FIELDS:
+            row.pop(field, None)
+        summary = orjson.dumps(row)
+
+        ids.append(model.id)
+        full_rows.append(full)
+        summary_rows.append(summary)
+        item_etags[model.id] = f'"{hashlib.sha256(full).hexdigest()[:32]}"'
+        catalogue_hash.update(full)
+        catalogue_hash.update(b"\n")
+
+    return CatalogueSnapshot(
+        version=catalogue_hash.hexdigest()[:32],
+        ids=ids,
+        full_rows=full_rows,
+        summary_rows=summary_rows,
+        by_id=dict(zip(ids, full_rows)),
+        item_etags=item_etags,
+    )
+
+
+def get_catalogue(db: Session) -> CatalogueSnapshot:
+    """
+    Return the current catalogue snapshot, loading it from the DB on first use.
+
+    The snapshot is also reloaded when another process (a sibling worker, or
+    `python -m app.snapshot import`) has published a different catalogue version.
+    """
+    global _seen_pointer
+    published = get_catalogue_pointer().read()
+    snapshot = _snapshot
+    if snapshot is not None and published == _seen_pointer:
+        return snapshot
+    with _lock:
+        if _snapshot is None or published != _seen_pointer:
+            _set_snapshot(_build_snapshot(db))
+            _seen_pointer = published
+        return _snapshot  # type: ignore[return-value]
+
+
+def refresh_catalogue(db: Session) -> CatalogueSnapshot:
+    """
+    Rebuild the snapshot from the DB and swap it in atomically.
+
+    Readers holding the previous snapshot keep a consistent view until their
+    request finishes; new requests see the new version.
+    """
+    global _seen_pointer
+    snapshot = _build_snapshot(db)
+    with _lock:
+        _set_snapshot(snapshot)
+        get_catalogue_pointer().publish(snapshot.version)
+        _seen_pointer = snapshot.version
+    return snapshot
+
+
+def _set_snapshot(snapshot: Optional[CatalogueSnapshot]) -> None:
+    global _snapshot
+    _snapshot = snapshot
+
+
+def encoded_etag(etag: str, coding: str) -> str:
+    """`"abc"` → `"abc-gzip"`: the ETag of the `coding`-encoded representation."""
+    if not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{coding}"'
+
+
+def match_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """
+    Evaluate an `If-None-Match` header against a strong ETag.
+
+    Matches the identity ETag or any of its content-coded variants (see
+    `encoded_etag`) and returns the tag the client sent, so a 304 echoes the
+    validator of the representation the client actually holds. Per RFC 9110,
+    `If-None-Match` uses weak comparison, so `W/"x"` matches `"x"`.
+    """
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+    prefix = etag[:-1] + "-"
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return candidate
+        if candidate.startswith(prefix) and candidate.endswith('"'):
+            coding = candidate[len(prefix) : -1]
+            if coding in CONTENT_CODINGS:
+                return candidate
+    return None
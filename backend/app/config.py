@@ -13,9 +13,39 @@ class Settings(BaseSettings):
     # Vector / embeddings
     embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
     chroma_db_dir: str = "./chroma_db"
+    # Bulk indexing: texts per model.encode batch, documents per chunk, and
+    # encoder processes (0 = one per CPU core, 1 = in-process). The process
+    # pool is opt-in and only used for at least `embed_pool_min_docs` docs.
+    embed_batch_size: int = 64
+    embed_chunk_size: int = 512
+    embed_workers: int = 1
+    embed_pool_min_docs: int = 5000
+
+    log_level: str = "INFO"
+
+    # Multi-worker mode: serve vector search from a memory-mapped matrix shared
+    # by all workers.
+    multi_worker: bool = False
+    # Version files that tell every process (workers, CLI commands) about
+    # catalogue/index updates; the shared matrix also lives here.
+    shared_state_dir: str = "./shared_state"
 
     # OpenAI 
     openai_api_key: str | None = None
+    llm_model: str = "gpt-4o-mini"
+    # Admission control: at most this many concurrent completions per worker.
+    llm_max_concurrency: int = 8
+    # How long a request may wait for a free slot before falling back.
+    llm_queue_timeout_seconds: float = 0.5
+    # Total time (queueing + completion) the LLM stage may take per request.
+    llm_latency_budget_seconds: float = 8.0
+    # Approximate token budget for the user message (query + candidates).
+    llm_prompt_token_budget: int = 600
+    completion_cache_ttl_seconds: float = 600.0
+    completion_cache_max_entries: int = 1024
+
+    # HTTP
+    gzip_minimum_size: int = 1024
 
     # CORS
     backend_cors_origins: List[str] = []
@@ -11,10 +11,12 @@ def get_embedding_model() -> SentenceTransformer:
     return SentenceTransformer(settings.embedding_model)
 
 
-def embed_texts(texts: List[str]) -> List[List[float]]:
+def embed_texts(texts: List[str], batch_size: int = 32) -> List[List[float]]:
     model = get_embedding_model()
     # Convert to plain list of floats for Chroma compatibility
-    vectors = model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+    vectors = model.encode(
+        texts, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True
+    )
     return [v.tolist() for v in vectors]
 
 
@@ -0,0 +1,170 @@
+"""
+Bulk encoder for full catalogue (re)indexing.
+
+Documents are sorted by length and cut into chunks, so each chunk holds
+similarly sized texts and the model wastes little work on padding. Chunks are
+encoded in-process, or in a process pool for large rebuilds, and yielded as
+they finish so the caller can stream them into the vector store instead of
+holding every vector in memory.
+
+    python -m app.indexing --workers 0   # rebuild using one process per core
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterator, List, Sequence, Tuple
+
+from .config import settings
+from .embeddings import embed_texts, get_embedding_model
+
+logger = logging.getLogger(__name__)
+
+EncodedChunk = Tuple[List[str], List[str], List[List[float]]]
+
+
+def length_buckets(docs: Sequence[str], chunk_size: int) -> List[List[int]]:
+    """Group document indices into chunks of similar length (longest first)."""
+    order = sorted(range(len(docs)), key=lambda i: len(docs[i]), reverse=True)
+    return [order[i : i + chunk_size] for i in range(0, len(order), chunk_size)]
+
+
+def resolve_workers(workers: int) -> int:
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def _init_worker(threads: int) -> None:
+    import torch
+
+    # N processes x all cores each would oversubscribe the CPU.
+    torch.set_num_threads(threads)
+    get_embedding_model()
+
+
+def _encode(docs: List[str], batch_size: int) -> List[List[float]]:
+    return embed_texts(docs, batch_size=batch_size)
+
+
+def encode_in_chunks(
+    ids: Sequence[str],
+    docs: Sequence[str],
+    batch_size: int | None = None,
+    chunk_size: int | None = None,
+    workers: int | None = None,
+) -> Iterator[EncodedChunk]:
+    """
+    Encode `docs` and yield `(ids, docs, vectors)` per chunk as each completes.
+
+    Chunks may complete out of order. Everything runs in the current process
+    unless more than one worker is requested and there are at least
+    `embed_pool_min_docs` documents; below that, spawning processes that each
+    re-import torch and reload the model costs more than it saves.
+    """
+    batch_size = batch_size or settings.embed_batch_size
+    chunk_size = chunk_size or settings.embed_chunk_size
+    workers = resolve_workers(settings.embed_workers if workers is None else workers)
+    if len(docs) < settings.embed_pool_min_docs:
+        workers = 1
+
+    buckets = length_buckets(docs, chunk_size)
+    total = len(docs)
+    done = 0
+    started = time.monotonic()
+
+    def _progress(n: int) -> None:
+        nonlocal done
+        done += n
+        elapsed = time.monotonic() - started
+        rate = done / elapsed if elapsed > 0 else 0.0
+        logger.info("Encoded %d/%d documents (%.1f docs/s)", done, total, rate)
+
+    if workers <= 1 or len(buckets) <= 1:
+        for bucket in buckets:
+            chunk_docs = [docs[i] for i in bucket]
+            vectors = _encode(chunk_docs, batch_size)
+            _progress(len(bucket))
+            yield [ids[i] for i in bucket], chunk_docs, vectors
+        return
+
+    workers = min(workers, len(buckets))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    # Spawn rather than fork: forking a process with live torch thread pools
+    # can deadlock.
+    ctx = multiprocessing.get_context("spawn")
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(threads,),
+    )
+    try:
+        pending = {}
+        for bucket in buckets:
+            chunk_docs = [docs[i] for i in bucket]
+            pending[pool.submit(_encode, chunk_docs, batch_size)] = (bucket, chunk_docs)
+
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                bucket, chunk_docs = pending.pop(future)
+                vectors = future.result()
+                _progress(len(bucket))
+                yield [ids[i] for i in bucket], chunk_docs, vectors
+    except BaseException:
+        # An encode or upsert failure (or the caller abandoning the generator)
+        # should not wait for every queued chunk to finish encoding.
+        pool.shutdown(wait=True, cancel_futures=True)
+        raise
+    pool.shutdown()
+
+
+def main(argv: List[str] | None = None) -> int:
+    import argparse
+
+    from sqlalchemy import select
+
+    from .database import SessionLocal
+    from .models import Product
+    from .vectorstore import upsert_products
+
+    parser = argparse.ArgumentParser(
+        prog="python -m app.indexing",
+        description="Rebuild the vector index from the products table.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Encoder processes (0 = one per CPU core, 1 = in-process).",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    db = SessionLocal()
+    try:
+        products = list(db.scalars(select(Product)))
+    finally:
+        db.close()
+
+    started = time.monotonic()
+    upsert_products(
+        product_ids=[p.id for p in products],
+        titles=[p.title for p in products],
+        descriptions=[p.description or "" for p in products],
+        features_list=[p.features or "" for p in products],
+        categories=[p.category or "" for p in products],
+        activities_list=[
+            [a.strip() for a in (p.activities or "").split(",") if a.strip()]
+            for p in products
+        ],
+        workers=args.workers,
+    )
+    logger.info("Indexed %d products in %.1fs", len(products), time.monotonic() - started)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
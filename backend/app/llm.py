@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import openai
+from openai import OpenAI
+
+from .config import settings
+
+
+class LLMUnavailable(Exception):
+    """
+    Raised when the LLM stage is skipped so callers can degrade gracefully.
+
+    `reason` is one of "saturated" (no free slot), "timeout" (latency budget
+    exceeded) or "error" (upstream API error).
+    """
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+_slots = threading.BoundedSemaphore(settings.llm_max_concurrency)
+# One thread per slot, so submitted calls never queue behind each other.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.llm_max_concurrency, thread_name_prefix="llm"
+)
+
+_metrics_lock = threading.Lock()
+_metrics: Dict[str, int] = {
+    "in_flight": 0,
+    "completed": 0,
+    "saturated": 0,
+    "timeout": 0,
+    "error": 0,
+}
+
+
+def _record(key: str, delta: int = 1) -> None:
+    with _metrics_lock:
+        _metrics[key] += delta
+
+
+def get_llm_metrics() -> Dict[str, int]:
+    with _metrics_lock:
+        return dict(_metrics)
+
+
+@lru_cache()
+def get_openai_client() -> OpenAI:
+    # Retries would blow through the latency budget; degrade instead.
+    return OpenAI(api_key=settings.openai_api_key, max_retries=0)
+
+
+def _release_slot(_: Optional[Future] = None) -> None:
+    _record("in_flight", -1)
+    _slots.release()
+
+
+def _create_completion(
+    messages: List[Dict[str, str]], temperature: float, timeout: float
+) -> str:
+    client = get_openai_client().with_options(timeout=timeout)
+    completion = client.chat.completions.create(
+        model=settings.llm_model,
+        messages=messages,  # type: ignore[arg-type]
+        temperature=temperature,
+    )
+    return completion.choices[0].message.content or ""
+
+
+def complete_chat(messages: List[Dict[str, str]], temperature: float = 0.4) -> str:
+    """
+    Run a chat completion under the concurrency cap and latency budget.
+
+    The deadline is enforced on the wall clock: waiting for a slot counts
+    against it, and the caller stops waiting for the API once it passes, so a
+    request never spends longer than `llm_latency_budget_seconds` here. An
+    abandoned call keeps its slot until the HTTP client's own timeout ends it,
+    so the concurrency cap still bounds upstream load.
+    """
+    deadline = time.monotonic() + settings.llm_latency_budget_seconds
+
+    wait = min(settings.llm_queue_timeout_seconds, settings.llm_latency_budget_seconds)
+    if not _slots.acquire(timeout=wait):
+        _record("saturated")
+        raise LLMUnavailable("saturated")
+
+    _record("in_flight")
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        _release_slot()
+        _record("timeout")
+        raise LLMUnavailable("timeout")
+
+    try:
+        # The HTTP timeout only bounds each phase (connect/read/...); it is a
+        # backstop that frees abandoned calls, not the request deadline.
+        future = _executor.submit(_create_completion, messages, temperature, remaining)
+    except BaseException:
+        _release_slot()
+        raise
+    future.add_done_callback(_release_slot)
+
+    try:
+        answer = future.result(timeout=remaining)
+    except FutureTimeout as exc:
+        _record("timeout")
+        raise LLMUnavailable("timeout") from exc
+    except openai.APITimeoutError as exc:
+        _record("timeout")
+        raise LLMUnavailable("timeout") from exc
+    except openai.OpenAIError as exc:
+        _record("error")
+        raise LLMUnavailable("error") from exc
+
+    _record("completed")
+    return answer
@@ -1,12 +1,35 @@
+import logging
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 from .config import settings
 from .database import Base, engine
+from .middleware import EncodedETagMiddleware
 from .routers import products, scrape, chat
 
 
+def configure_logging() -> None:
+    """
+    Give the `app.*` loggers their own handler.
+
+    uvicorn and gunicorn only configure their own loggers, so without this,
+    INFO messages such as indexing progress would be dropped.
+    """
+    logger = logging.getLogger("app")
+    logger.setLevel(settings.log_level)
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        )
+        logger.addHandler(handler)
+        logger.propagate = False
+
+
 def create_app() -> FastAPI:
+    configure_logging()
     Base.metadata.create_all(bind=engine)
 
     app = FastAPI(title=settings.app_name)
@@ -28,6 +51,11 @@ def create_app() -> FastAPI:
             allow_headers=["*"],
         )
 
+    # Product listings carry long descriptions; compress anything non-trivial.
+    app.add_middleware(GZipMiddleware, minimum_size=settings.gzip_minimum_size)
+    # Added after GZip so it wraps it and sees the final Content-Encoding.
+    app.add_middleware(EncodedETagMiddleware)
+
     app.include_router(products.router)
     app.include_router(scrape.router)
     app.include_router(chat.router)
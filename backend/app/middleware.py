@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .catalogue import encoded_etag
+
+
+class EncodedETagMiddleware:
+    """
+    Give content-coded responses their own strong ETag.
+
+    GZipMiddleware compresses the body but keeps the ETag of the identity
+    representation; RFC 9110 requires strong validators to differ between
+    content codings. This must wrap GZipMiddleware (be added after it) so it
+    sees the final Content-Encoding header.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                etag = headers.get("etag")
+                coding = headers.get("content-encoding")
+                if etag and coding and coding != "identity":
+                    headers["etag"] = encoded_etag(etag, coding)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
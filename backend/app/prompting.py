@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from typing import List, Sequence, Tuple
+
+from .schemas import ChatProductSnippet
+
+
+# Bump whenever SYSTEM_PROMPT or the candidate line format changes so cached
+# completions built from the old prompt are not reused.
+PROMPT_VERSION = "2"
+
+SYSTEM_PROMPT = """
+You are an AI shopping assistant for Hunnit activewear.
+You help users discover the best products for their needs.
+
+When answering:
+- Interpret abstract, high-level queries (e.g. gym + meetings).
+- Use the retrieved products as your source of truth.
+- Explain WHY each recommended product is a good fit, referencing activities, fit, fabric, and use-cases.
+- If the query is too vague, ask 1-2 short clarifying questions before final recommendations.
+- Keep answers concise and friendly (2-4 sentences).
+"""
+
+MAX_TITLE_CHARS = 80
+MAX_ACTIVITIES = 6
+
+
+def normalise_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (~4 characters per token for English text).
+
+    Good enough for budgeting without pulling in a tokenizer dependency.
+    """
+    return len(text) // 4 + 1
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    return text[: max_chars - 1].rstrip() + "…"
+
+
+def format_candidate(s: ChatProductSnippet) -> str:
+    """Compact one-line description of a candidate product for the prompt."""
+    price = f"₹{s.price:.0f}" if s.price else "₹—"
+    activities = ", ".join(s.activities[:MAX_ACTIVITIES]) or "N/A"
+    return f"- {_truncate(s.title, MAX_TITLE_CHARS)} | {price} | {s.category or 'N/A'} | {activities}"
+
+
+def build_user_context(
+    query: str,
+    snippets: Sequence[ChatProductSnippet],
+    max_tokens: int,
+) -> Tuple[str, List[ChatProductSnippet]]:
+    """
+    Build the user message within `max_tokens`, dropping the lowest-ranked
+    candidates once the budget is spent.
+
+    Returns the message and the candidates that made it into the prompt, in
+    order; an over-long query is truncated to half of the budget.
+    """
+    query = _truncate(query, max(1, max_tokens // 2) * 4)
+    header = f"User query: {query}\n\nCandidate products:\n"
+    used = estimate_tokens(header)
+
+    lines: List[str] = []
+    included: List[ChatProductSnippet] = []
+    for s in snippets:
+        line = format_candidate(s)
+        cost = estimate_tokens(line)
+        if used + cost > max_tokens:
+            break
+        lines.append(line)
+        included.append(s)
+        used += cost
+
+    return header + "\n".join(lines), included
@@ -1,36 +1,37 @@
 from typing import List
 
 from fastapi import APIRouter, Depends
-from openai import OpenAI
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from ..cache import TTLCache
+from ..coalesce import SingleFlight
 from ..config import settings
 from ..database import get_db
+from ..llm import LLMUnavailable, complete_chat, get_llm_metrics
 from ..models import Product
+from ..prompting import PROMPT_VERSION, SYSTEM_PROMPT, build_user_context, normalise_query
 from ..schemas import (
     ChatProductSnippet,
     ChatRequest,
     ChatMessage,
     ChatResponse,
 )
-from ..vectorstore import query_products
+from ..shared import get_catalogue_pointer
+from ..vectorstore import get_index_version, query_products
 
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+# Concurrent identical queries share one embed + search + completion.
+_inflight: SingleFlight[ChatResponse] = SingleFlight()
 
-SYSTEM_PROMPT = """
-You are an AI shopping assistant for Hunnit activewear.
-You help users discover the best products for their needs.
-
-When answering:
-- Interpret abstract, high-level queries (e.g. gym + meetings).
-- Use the retrieved products as your source of truth.
-- Explain WHY each recommended product is a good fit, referencing activities, fit, fabric, and use-cases.
-- If the query is too vague, ask 1-2 short clarifying questions before final recommendations.
-- Keep answers concise and friendly (2-4 sentences).
-"""
+# Answers keyed by (normalised query, ordered prompt product IDs, catalogue
+# version, prompt version).
+_completion_cache: TTLCache[str] = TTLCache(
+    max_entries=settings.completion_cache_max_entries,
+    ttl_seconds=settings.completion_cache_ttl_seconds,
+)
 
 
 def _rerank_for_query(query: str, snippets: List[ChatProductSnippet]) -> List[ChatProductSnippet]:
@@ -92,6 +93,18 @@ def _fallback_response(message: str, snippets: List[ChatProductSnippet]) -> Chat
     )
 
 
+def _for_caller(response: ChatResponse, query: str) -> ChatResponse:
+    """
+    Give a caller that joined a coalesced request its own copy of the result,
+    echoing back the query exactly as that caller typed it.
+    """
+    response = response.model_copy(deep=True)
+    for message in response.messages:
+        if message.role == "user":
+            message.content = query
+    return response
+
+
 @router.post("/query", response_model=ChatResponse)
 def chat_query(payload: ChatRequest, db: Session = Depends(get_db)):
     query = payload.message.strip()
@@ -106,7 +119,15 @@ def chat_query(payload: ChatRequest, db: Session = Depends(get_db)):
             products=[],
         )
 
-    vector_results = query_products(query, top_k=payload.top_k)
+    key = (normalise_query(query), payload.top_k, get_index_version())
+    response, shared = _inflight.do(key, lambda: _answer_query(query, payload.top_k, db))
+    if shared:
+        return _for_caller(response, query)
+    return response
+
+
+def _answer_query(query: str, top_k: int, db: Session) -> ChatResponse:
+    vector_results = query_products(query, top_k=top_k)
 
     ids = [int(x) for x in (vector_results.get("ids", [[]])[0] or [])]
     distances = vector_results.get("distances", [[]])[0] or []
@@ -144,35 +165,51 @@ def chat_query(payload: ChatRequest, db: Session = Depends(get_db)):
     if not settings.openai_api_key:
         return _fallback_response(query, snippets)
 
-    client = OpenAI(api_key=settings.openai_api_key)
-
-    products_context_lines = []
-    for s in snippets:
-        line = f"- {s.title} (₹{s.price or '—'}), category={s.category or 'N/A'}, activities={', '.join(s.activities) or 'N/A'}, url={s.product_url}"
-        products_context_lines.append(line)
-
-    user_context = (
-        f"User query: {query}\n\n"
-        f"Candidate products:\n" + "\n".join(products_context_lines)
+    user_context, prompt_snippets = build_user_context(
+        query, snippets, max_tokens=settings.llm_prompt_token_budget
     )
+    if not prompt_snippets:
+        # Nothing fits the budget; an answer without candidates is useless.
+        return _fallback_response(query, snippets)
 
-    completion = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": user_context},
-        ],
-        temperature=0.4,
+    # Answers quote titles and prices, so a new catalogue version (e.g. after
+    # /scrape/run changed prices) must not reuse them.
+    cache_key = (
+        normalise_query(query),
+        tuple(s.id for s in prompt_snippets),
+        get_catalogue_pointer().read(),
+        PROMPT_VERSION,
     )
 
-    answer = completion.choices[0].message.content or ""
+    answer = _completion_cache.get(cache_key)
+    if answer is None:
+        try:
+            answer = complete_chat(
+                [
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": user_context},
+                ],
+                temperature=0.4,
+            )
+        except LLMUnavailable as exc:
+            # Keep tail latency bounded: answer from the template instead.
+            response = _fallback_response(query, snippets)
+            response.degraded = True
+            response.degraded_reason = exc.reason
+            return response
+        _completion_cache.set(cache_key, answer)
 
     return ChatResponse(
         messages=[
             ChatMessage(role="user", content=query),
             ChatMessage(role="assistant", content=answer),
         ],
-        products=snippets,
+        # Only the products the answer was written from.
+        products=prompt_snippets,
     )
 
 
+@router.get("/metrics")
+def chat_metrics():
+    """Counters for the LLM admission controller (per worker)."""
+    return {"llm": get_llm_metrics()}
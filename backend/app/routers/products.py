@@ -1,59 +1,56 @@
-from typing import List
+from typing import Literal, Union
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select, func
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
+from ..catalogue import get_catalogue, match_etag
 from ..database import get_db
-from ..models import Product as ProductModel
 from ..schemas import Product as ProductSchema
-from ..schemas import ProductListResponse
+from ..schemas import ProductListResponse, ProductSummaryListResponse
 
 
 router = APIRouter(prefix="/products", tags=["products"])
 
 
-def _to_schema(model: ProductModel) -> ProductSchema:
-  """Convert SQLAlchemy model → Pydantic schema with parsed activities list."""
-  activities = [
-      a.strip()
-      for a in (model.activities or "").split(",")
-      if a.strip()
-  ]
-  return ProductSchema(
-      id=model.id,
-      title=model.title,
-      slug=model.slug,
-      product_url=model.product_url,
-      price=model.price,
-      currency=model.currency,
-      description=model.description,
-      features=model.features,
-      image_url=model.image_url,
-      category=model.category,
-      subcategory=model.subcategory,
-      activities=activities,
-  )
-
-
-@router.get("", response_model=ProductListResponse)
+def _json_response(body: bytes, etag: str) -> Response:
+    # Rows are already serialised in the catalogue snapshot, so we bypass
+    # `response_model` validation and send the bytes as-is.
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+@router.get("", response_model=Union[ProductListResponse, ProductSummaryListResponse])
 def list_products(
+    request: Request,
     db: Session = Depends(get_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
+    view: Literal["full", "summary"] = Query(
+        "full", description="`summary` leaves out the HTML description."
+    ),
 ):
-    total = db.scalar(select(func.count()).select_from(ProductModel)) or 0
-    stmt = select(ProductModel).offset(skip).limit(limit)
-    models: List[ProductModel] = list(db.scalars(stmt))
-    items = [_to_schema(m) for m in models]
-    return ProductListResponse(total=total, items=items)
+    catalogue = get_catalogue(db)
+    etag = catalogue.list_etag(skip, limit, view)
+    matched = match_etag(request.headers.get("if-none-match"), etag)
+    if matched:
+        return Response(status_code=304, headers={"ETag": matched})
+
+    return _json_response(catalogue.render_list(skip, limit, view), etag)
 
 
 @router.get("/{product_id}", response_model=ProductSchema)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    model = db.get(ProductModel, product_id)
-    if not model:
+def get_product(
+    product_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    catalogue = get_catalogue(db)
+    body = catalogue.by_id.get(product_id)
+    if body is None:
         raise HTTPException(status_code=404, detail="Product not found")
-    return _to_schema(model)
 
+    etag = catalogue.item_etags[product_id]
+    matched = match_etag(request.headers.get("if-none-match"), etag)
+    if matched:
+        return Response(status_code=304, headers={"ETag": matched})
 
+    return _json_response(body, etag)
@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from ..catalogue import refresh_catalogue
 from ..database import get_db
 from ..models import Product
 from ..schemas import Product as ProductSchema
@@ -69,6 +70,9 @@ def run_scraper(db: Session = Depends(get_db)):
     for p in upserted:
         db.refresh(p)
 
+    # Publish the new catalogue version to the product endpoints.
+    refresh_catalogue(db)
+
     return upserted
 
 
@@ -33,6 +33,27 @@ class ProductListResponse(BaseModel):
     items: List[Product]
 
 
+class ProductSummary(BaseModel):
+    """Lightweight list representation of a product (no HTML description)."""
+
+    id: int
+    title: str
+    slug: str
+    product_url: HttpUrl
+    price: Optional[float] = None
+    currency: Optional[str] = "INR"
+    features: Optional[str] = None
+    image_url: Optional[HttpUrl] = None
+    category: Optional[str] = None
+    subcategory: Optional[str] = None
+    activities: List[str] = []
+
+
+class ProductSummaryListResponse(BaseModel):
+    total: int
+    items: List[ProductSummary]
+
+
 class ChatRequest(BaseModel):
     message: str
     top_k: int = 8
@@ -58,5 +79,8 @@ class ChatMessage(BaseModel):
 class ChatResponse(BaseModel):
     messages: List[ChatMessage]
     products: List[ChatProductSnippet]
+    # Set when the LLM stage was skipped and the template answer was used.
+    degraded: bool = False
+    degraded_reason: Optional[str] = None
 
 
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import settings
+
+
+class VersionPointer:
+    """
+    A small file holding the current version of some shared state.
+
+    Writers replace the file atomically; readers only re-read it when its
+    inode/mtime changes, so polling it on every request costs one `stat`.
+    This is how workers learn about updates made by a sibling worker or a CLI
+    command such as `python -m app.snapshot import`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stat_key: Optional[Tuple[int, int, int]] = None
+        self._value: Optional[str] = None
+
+    def read(self) -> Optional[str]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            if key != self._stat_key:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._value = f.read().strip() or None
+                self._stat_key = key
+            return self._value
+
+    def publish(self, value: str) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(value)
+        os.replace(tmp, self.path)
+
+
+def _index_dir() -> str:
+    return os.path.join(settings.shared_state_dir, "index")
+
+
+@lru_cache()
+def get_catalogue_pointer() -> VersionPointer:
+    return VersionPointer(os.path.join(settings.shared_state_dir, "catalogue.version"))
+
+
+@lru_cache()
+def get_index_generation_pointer() -> VersionPointer:
+    """Bumped on every vector store update, in every mode."""
+    return VersionPointer(os.path.join(settings.shared_state_dir, "index.version"))
+
+
+@lru_cache()
+def get_index_pointer() -> VersionPointer:
+    """
+    Current shared matrix version. Equal to the index version it was
+    published for (see `get_index_generation_pointer`).
+    """
+    return VersionPointer(os.path.join(_index_dir(), "CURRENT"))
+
+
+@dataclass(frozen=True)
+class VectorMatrix:
+    """
+    Read-only, memory-mapped float32 matrix of normalised product embeddings.
+
+    Every worker maps the same file, so the pages live once in the OS page
+    cache instead of once per process.
+    """
+
+    version: str
+    ids: np.ndarray
+    vectors: np.ndarray
+
+    def search(self, query_vec: Sequence[float], top_k: int) -> Tuple[List[int], List[float]]:
+        n = len(self.ids)
+        if n == 0 or top_k <= 0:
+            return [], []
+        q = np.asarray(query_vec, dtype=np.float32)
+        sims = self.vectors @ q
+        k = min(top_k, n)
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+        # Squared L2 between unit vectors, matching Chroma's default "l2" space
+        # so reranking sees the same scale regardless of backend.
+        distances = 2.0 - 2.0 * sims[top]
+        return [int(i) for i in self.ids[top]], [float(d) for d in distances]
+
+
+_matrix_lock = threading.Lock()
+_matrix: Optional[VectorMatrix] = None
+
+
+def publish_vector_matrix(
+    ids: Sequence[int],
+    vectors: Sequence[Sequence[float]],
+    version: Optional[str] = None,
+) -> str:
+    """
+    Write a new matrix version and point all workers at it.
+
+    `version` should be the index version it is published for, so readers can
+    tell when the matrix lags behind the index. Older versions are pruned,
+    keeping the previous one for workers that have not switched yet
+    (already-mapped files stay valid after unlink on POSIX).
+    """
+    index_dir = _index_dir()
+    os.makedirs(index_dir, exist_ok=True)
+    version = version or str(time.time_ns())
+
+    ids_arr = np.asarray(ids, dtype=np.int64)
+    vec_arr = np.asarray(vectors, dtype=np.float32)
+    if not len(ids_arr):
+        vec_arr = np.zeros((0, 0), dtype=np.float32)
+    for name, arr in (("ids", ids_arr), ("vectors", vec_arr)):
+        tmp = os.path.join(index_dir, f".{name}-{version}.npy")
+        np.save(tmp, arr)
+        os.replace(tmp, os.path.join(index_dir, f"{name}-{version}.npy"))
+
+    get_index_pointer().publish(version)
+    _prune_versions(index_dir, keep=2)
+    return version
+
+
+def _prune_versions(index_dir: str, keep: int) -> None:
+    versions = sorted(
+        {f.split("-", 1)[1][: -len(".npy")] for f in os.listdir(index_dir) if f.startswith("vectors-")},
+        key=int,
+    )
+    for old in versions[:-keep]:
+        for name in ("ids", "vectors"):
+            try:
+                os.remove(os.path.join(index_dir, f"{name}-{old}.npy"))
+            except FileNotFoundError:
+                pass
+
+
+def _map_version(version: str) -> VectorMatrix:
+    index_dir = _index_dir()
+    return VectorMatrix(
+        version=version,
+        ids=np.load(os.path.join(index_dir, f"ids-{version}.npy")),
+        vectors=np.load(os.path.join(index_dir, f"vectors-{version}.npy"), mmap_mode="r"),
+    )
+
+
+def load_vector_matrix() -> Optional[VectorMatrix]:
+    """
+    Return the current matrix, remapping it if another worker published a new
+    version. Returns None if no matrix has been published yet.
+
+    Returns None as well when the matrix is older than the index version
+    (the index was updated without republishing it), so callers fall back to
+    Chroma instead of serving ids that may no longer exist.
+
+    If the version we read is pruned before we map it (several publishes
+    landed in between), the pointer is re-read; if that keeps failing the
+    previously mapped matrix is served rather than failing the request.
+    """
+    global _matrix
+    version = get_index_pointer().read()
+    if version is None:
+        return _matrix
+    index_version = get_index_generation_pointer().read()
+    if index_version is not None and int(version) < int(index_version):
+        return None
+    matrix = _matrix
+    if matrix is not None and matrix.version == version:
+        return matrix
+    with _matrix_lock:
+        for _ in range(3):
+            if _matrix is not None and _matrix.version == version:
+                break
+            try:
+                _matrix = _map_version(version)
+                break
+            except FileNotFoundError:
+                latest = get_index_pointer().read()
+                if latest is None or latest == version:
+                    break
+                version = latest
+        return _matrix
@@ -0,0 +1,277 @@
+"""
+Export / import the catalogue and its embeddings as a single archive.
+
+    python -m app.snapshot export catalogue.snapshot.zip
+    python -m app.snapshot import catalogue.snapshot.zip
+
+The archive lets a new replica or test environment start without scraping
+Hunnit or re-embedding the catalogue. It contains:
+
+- manifest.json    format version, embedding model, counts
+- products.jsonl   rows of the `products` table (including ids)
+- ids.npy          int64 product ids, aligned with vectors.npy
+- vectors.npy      float32 embedding matrix
+- doc_hashes.json  sha256 of each indexed document, keyed by product id
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import sys
+import zipfile
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import numpy as np
+import requests
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from .catalogue import refresh_catalogue
+from .config import settings
+from .database import Base, SessionLocal, engine
+from .indexing import encode_in_chunks
+from .models import Product
+from .shared import get_index_pointer, load_vector_matrix
+from .vectorstore import (
+    build_product_document,
+    document_hash,
+    export_vectors,
+    store_vectors,
+)
+
+
+FORMAT_NAME = "rightpick-catalogue-snapshot"
+FORMAT_VERSION = 1
+
+PRODUCT_COLUMNS = [c.name for c in Product.__table__.columns]
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _product_document(row: Dict[str, Any]) -> str:
+    activities = [a.strip() for a in (row.get("activities") or "").split(",") if a.strip()]
+    return build_product_document(
+        row["title"],
+        row.get("description") or "",
+        row.get("features") or "",
+        row.get("category") or "",
+        activities,
+    )
+
+
+def export_snapshot(db: Session, path: str) -> Dict[str, Any]:
+    rows = [
+        {col: getattr(p, col) for col in PRODUCT_COLUMNS}
+        for p in db.scalars(select(Product).order_by(Product.id))
+    ]
+
+    stored = export_vectors()
+    ids = np.asarray([int(i) for i in stored["ids"]], dtype=np.int64)
+    vectors = np.asarray(stored["embeddings"], dtype=np.float32)
+    if not len(ids):
+        vectors = np.zeros((0, 0), dtype=np.float32)
+    doc_hashes = {
+        str(pid): document_hash(doc)
+        for pid, doc in zip(stored["ids"], stored["documents"])
+    }
+
+    manifest = {
+        "format": FORMAT_NAME,
+        "format_version": FORMAT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "embedding_model": settings.embedding_model,
+        "product_count": len(rows),
+        "vector_count": int(len(ids)),
+        "vector_dim": int(vectors.shape[1]) if len(ids) else 0,
+    }
+
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("manifest.json", json.dumps(manifest, indent=2))
+        zf.writestr(
+            "products.jsonl",
+            "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows),
+        )
+        zf.writestr("doc_hashes.json", json.dumps(doc_hashes))
+        for name, arr in (("ids.npy", ids), ("vectors.npy", vectors)):
+            buf = io.BytesIO()
+            np.save(buf, arr)
+            zf.writestr(name, buf.getvalue())
+
+    return manifest
+
+
+def _read_npy(zf: zipfile.ZipFile, name: str) -> np.ndarray:
+    return np.load(io.BytesIO(zf.read(name)), allow_pickle=False)
+
+
+def import_snapshot(db: Session, path: str) -> Dict[str, Any]:
+    """
+    Replace the `products` table and the vector store with the archive contents.
+
+    Documents whose hash no longer matches (e.g. `build_product_document`
+    changed since the export) are re-embedded; everything else reuses the
+    stored vectors.
+    """
+    with zipfile.ZipFile(path, "r") as zf:
+        manifest = json.loads(zf.read("manifest.json"))
+        if manifest.get("format") != FORMAT_NAME:
+            raise SnapshotError(f"{path} is not a catalogue snapshot")
+        if manifest.get("format_version") != FORMAT_VERSION:
+            raise SnapshotError(
+                f"Unsupported snapshot format version {manifest.get('format_version')}"
+            )
+        if manifest.get("embedding_model") != settings.embedding_model:
+            raise SnapshotError(
+                f"Snapshot was embedded with {manifest.get('embedding_model')!r}, "
+                f"but EMBEDDING_MODEL is {settings.embedding_model!r}"
+            )
+
+        rows: List[Dict[str, Any]] = [
+            json.loads(line)
+            for line in zf.read("products.jsonl").decode("utf-8").splitlines()
+            if line.strip()
+        ]
+        doc_hashes: Dict[str, str] = json.loads(zf.read("doc_hashes.json"))
+        ids = _read_npy(zf, "ids.npy")
+        vectors = _read_npy(zf, "vectors.npy")
+
+    if len(ids) != vectors.shape[0]:
+        raise SnapshotError(
+            f"ids.npy has {len(ids)} entries but vectors.npy has {vectors.shape[0]} rows"
+        )
+    if len(ids) and vectors.shape[1] != manifest.get("vector_dim"):
+        raise SnapshotError(
+            f"vectors.npy has dimension {vectors.shape[1]}, "
+            f"but the manifest says {manifest.get('vector_dim')}"
+        )
+
+    # Bulk-load the products table in one transaction.
+    db.execute(delete(Product))
+    if rows:
+        db.execute(insert(Product), rows)
+    if engine.dialect.name == "postgresql":
+        # Keep SERIAL ids ahead of the imported ones for future scrapes.
+        max_id = db.scalar(select(func.max(Product.id))) or 0
+        db.execute(
+            text("SELECT setval(pg_get_serial_sequence('products', 'id'), :v, :called)"),
+            {"v": max(max_id, 1), "called": max_id > 0},
+        )
+    db.commit()
+
+    vector_by_id = {int(pid): i for i, pid in enumerate(ids)}
+    out_ids: List[str] = []
+    docs: List[str] = []
+    out_vectors: List[Any] = []
+    stale: List[int] = []
+    for row in rows:
+        pid = row["id"]
+        if pid not in vector_by_id:
+            continue
+        doc = _product_document(row)
+        out_ids.append(str(pid))
+        docs.append(doc)
+        if doc_hashes.get(str(pid)) == document_hash(doc):
+            out_vectors.append(vectors[vector_by_id[pid]].tolist())
+        else:
+            out_vectors.append(None)
+            stale.append(len(out_ids) - 1)
+
+    if stale:
+        # Keys are positions in out_vectors; chunks may complete out of order.
+        for keys, _, chunk_vectors in encode_in_chunks(
+            [str(pos) for pos in stale], [docs[pos] for pos in stale]
+        ):
+            for key, vec in zip(keys, chunk_vectors):
+                out_vectors[int(key)] = vec
+
+    # Bumps the index version and, when a shared matrix exists, republishes it
+    # so multi-worker servers search the imported vectors.
+    store_vectors(out_ids, docs, out_vectors, replace=True)
+    # Publishes the catalogue version, so running servers reload on their
+    # next request.
+    refresh_catalogue(db)
+
+    result: Dict[str, Any] = {
+        "products": len(rows),
+        "vectors": len(out_ids),
+        "reembedded": len(stale),
+    }
+    if get_index_pointer().read() is not None:
+        matrix = load_vector_matrix()
+        matrix_ids = {int(i) for i in matrix.ids} if matrix is not None else None
+        if matrix_ids != {int(i) for i in out_ids}:
+            raise SnapshotError(
+                "The shared vector matrix does not match the imported vectors; "
+                "multi-worker servers would keep searching stale ids"
+            )
+        result["shared_matrix"] = matrix.version  # type: ignore[union-attr]
+    return result
+
+
+def check_server(base_url: str, db: Session) -> Dict[str, Any]:
+    """
+    Ask a running backend a question and verify that `/chat/query` only
+    returns products that exist in the (imported) `products` table.
+    """
+    product_ids = set(db.scalars(select(Product.id)))
+    title = db.scalar(select(Product.title).order_by(Product.id).limit(1))
+    if title is None:
+        return {"checked": False, "reason": "no products"}
+
+    resp = requests.post(
+        f"{base_url.rstrip('/')}/chat/query",
+        json={"message": title, "top_k": 5},
+        timeout=30,
+    )
+    resp.raise_for_status()
+    returned = [p["id"] for p in resp.json().get("products", [])]
+    unknown = [pid for pid in returned if pid not in product_ids]
+    if not returned or unknown:
+        raise SnapshotError(
+            f"{base_url} returned products {returned} for {title!r}; "
+            f"expected ids from the imported catalogue (unknown: {unknown})"
+        )
+    return {"checked": True, "query": title, "products": returned}
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.snapshot",
+        description="Export or import the catalogue + embedding snapshot.",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("export", help="Write a snapshot archive").add_argument("path")
+    import_parser = sub.add_parser("import", help="Load a snapshot archive")
+    import_parser.add_argument("path")
+    import_parser.add_argument(
+        "--check-url",
+        help="After importing, verify that the backend at this URL serves the "
+        "imported products from /chat/query (e.g. http://localhost:8000).",
+    )
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if args.command == "export":
+            result = export_snapshot(db, args.path)
+        else:
+            result = import_snapshot(db, args.path)
+            if args.check_url:
+                result["server_check"] = check_server(args.check_url, db)
+    except (SnapshotError, requests.RequestException) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
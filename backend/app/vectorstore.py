@@ -1,10 +1,20 @@
+import hashlib
+import time
+from contextlib import closing
 from typing import Iterable, List, Sequence
 
 import chromadb
-from chromadb.utils import embedding_functions
+from chromadb.errors import NotFoundError
 
 from .config import settings
 from .embeddings import embed_texts
+from .indexing import encode_in_chunks
+from .shared import (
+    get_index_generation_pointer,
+    get_index_pointer,
+    load_vector_matrix,
+    publish_vector_matrix,
+)
 
 
 def get_chroma_client():
@@ -13,15 +23,27 @@ def get_chroma_client():
 
 COLLECTION_NAME = "products"
 
+# Chroma rejects very large upserts; stay well below its max batch size.
+UPSERT_BATCH_SIZE = 1000
+
+
+def get_index_version() -> str:
+    """
+    Version of the index, changed on every index update.
+
+    Used to key request coalescing so callers never share results computed
+    against an older index. It lives in a shared file, so every worker (and
+    updates made from the CLI) agree on it.
+    """
+    return get_index_generation_pointer().read() or "0"
+
 
 def get_products_collection():
     client = get_chroma_client()
 
-    # We plug in a dummy embedding function because we provide embeddings directly
-    ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-        model_name=settings.embedding_model
-    )
-    coll = client.get_or_create_collection(name=COLLECTION_NAME, embedding_function=ef)
+    # No embedding function: vectors are always supplied by the caller, and
+    # Chroma's own SentenceTransformer wrapper would load a second model copy.
+    coll = client.get_or_create_collection(name=COLLECTION_NAME, embedding_function=None)
     return coll
 
 
@@ -70,9 +92,8 @@ def upsert_products(
     features_list: Iterable[str | None],
     categories: Iterable[str | None],
     activities_list: Iterable[Sequence[str] | None],
+    workers: int | None = None,
 ):
-    collection = get_products_collection()
-
     docs: List[str] = []
     ids: List[str] = []
 
@@ -83,19 +104,113 @@ def upsert_products(
         docs.append(doc)
         ids.append(str(pid))
 
-    vectors = embed_texts(docs)
+    # Stream each encoded chunk into the store as soon as it is ready.
+    collection = get_products_collection()
+    # closing() stops the encoder pool promptly if an upsert fails.
+    with closing(encode_in_chunks(ids, docs, workers=workers)) as chunks:
+        for chunk_ids, chunk_docs, vectors in chunks:
+            _write_vectors(collection, chunk_ids, chunk_docs, vectors)
+    _index_updated(collection)
+
+
+def store_vectors(
+    ids: Sequence[str],
+    docs: Sequence[str],
+    vectors: Sequence[Sequence[float]],
+    replace: bool = False,
+):
+    """
+    Write precomputed embeddings to the store in batches.
+
+    With `replace=True` the collection is dropped first, so it ends up holding
+    exactly these vectors.
+    """
+    if replace:
+        client = get_chroma_client()
+        try:
+            client.delete_collection(COLLECTION_NAME)
+        except (ValueError, NotFoundError):
+            pass
+    collection = get_products_collection()
+    _write_vectors(collection, ids, docs, vectors)
+    _index_updated(collection)
+
+
+def _write_vectors(
+    collection,
+    ids: Sequence[str],
+    docs: Sequence[str],
+    vectors: Sequence[Sequence[float]],
+) -> None:
+    for start in range(0, len(ids), UPSERT_BATCH_SIZE):
+        end = start + UPSERT_BATCH_SIZE
+        collection.upsert(
+            ids=list(ids[start:end]),
+            documents=list(docs[start:end]),
+            embeddings=list(vectors[start:end]),
+            metadatas=None,
+        )
+
+
+def _index_updated(collection, publish_matrix: bool = False) -> None:
+    """
+    Bump the index version, republishing the shared matrix under the same
+    version first.
+
+    The matrix is republished whenever one already exists, not only when this
+    process runs in multi-worker mode: a CLI rebuild or snapshot import must
+    not leave workers searching ids that are no longer in the store.
+    """
+    version = str(time.time_ns())
+    if publish_matrix or settings.multi_worker or get_index_pointer().read() is not None:
+        _publish_shared_matrix(collection, version)
+    get_index_generation_pointer().publish(version)
+
+
+def export_vectors():
+    """Return every stored id, document and embedding."""
+    collection = get_products_collection()
+    return collection.get(include=["documents", "embeddings"])
+
 
-    collection.upsert(
-        ids=ids,
-        documents=docs,
-        embeddings=vectors,
-        metadatas=None,
+def document_hash(doc: str) -> str:
+    return hashlib.sha256(doc.encode("utf-8")).hexdigest()
+
+
+def shared_matrix_is_current() -> bool:
+    """True if the shared matrix was published for the current index version."""
+    matrix_version = get_index_pointer().read()
+    index_version = get_index_generation_pointer().read()
+    return matrix_version is not None and (
+        index_version is None or matrix_version == index_version
+    )
+
+
+def publish_shared_matrix_from_store() -> None:
+    """Publish the shared matrix from whatever the Chroma collection holds."""
+    _index_updated(get_products_collection(), publish_matrix=True)
+
+
+def _publish_shared_matrix(collection, version: str) -> None:
+    """Export every embedding in the collection as the new shared matrix."""
+    data = collection.get(include=["embeddings"])
+    publish_vector_matrix(
+        ids=[int(i) for i in data["ids"]],
+        vectors=data["embeddings"],
+        version=version,
     )
 
 
 def query_products(query: str, top_k: int = 8):
-    collection = get_products_collection()
     query_vec = embed_texts([query])[0]
+
+    if settings.multi_worker:
+        matrix = load_vector_matrix()
+        if matrix is not None:
+            ids, distances = matrix.search(query_vec, top_k)
+            return {"ids": [[str(i) for i in ids]], "distances": [distances]}
+
+    collection = get_products_collection()
     results = collection.query(
         query_embeddings=[query_vec],
         n_results=top_k,
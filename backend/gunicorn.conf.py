@@ -0,0 +1,50 @@
+"""
+Multi-worker entrypoint:
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+The app and its read-only state (embedding model weights, memory-mapped vector
+matrix) are loaded once in the master process before forking, so workers share
+those pages copy-on-write instead of each loading their own copy.
+"""
+import multiprocessing
+import os
+
+# Must be set before the app (and its settings) are imported by preload.
+os.environ.setdefault("MULTI_WORKER", "true")
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+
+
+def on_starting(server):
+    from app.embeddings import get_embedding_model
+    from app.shared import load_vector_matrix
+    from app.vectorstore import publish_shared_matrix_from_store, shared_matrix_is_current
+
+    if not shared_matrix_is_current():
+        # No matrix yet (the Chroma index predates multi-worker mode), or the
+        # index was updated without republishing it: export it so workers
+        # search a matrix that matches the store. This runs in a throwaway
+        # process so the master never holds a Chroma client (and its SQLite
+        # connections) across fork.
+        proc = multiprocessing.get_context("spawn").Process(
+            target=publish_shared_matrix_from_store
+        )
+        proc.start()
+        proc.join()
+
+    # Load weights only; no inference happens in the master, so no torch
+    # thread pools exist yet when workers are forked.
+    get_embedding_model()
+    load_vector_matrix()
+
+
+def post_fork(server, worker):
+    from app.database import engine
+
+    # Connections opened by the master (create_all) must not be shared.
+    engine.dispose(close=False)
@@ -8,8 +8,8 @@ async function handleResponse(res) {
   return res.json();
 }
 
-export async function fetchProducts({ skip = 0, limit = 50 } = {}) {
-  const res = await fetch(`${BASE_URL}/products?skip=${skip}&limit=${limit}`);
+export async function fetchProducts({ skip = 0, limit = 50, view = "summary" } = {}) {
+  const res = await fetch(`${BASE_URL}/products?skip=${skip}&limit=${limit}&view=${view}`);
   return handleResponse(res);
 }
 